@@ -14,6 +14,8 @@
 
 """System tests for Vision API."""
 
+import concurrent.futures
+import csv
 import grpc
 import io
 import json
@@ -21,9 +23,17 @@ import os
 import time
 import unittest
 
+import six
+
+import google.auth
+from google.api_core import grpc_helpers
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import exceptions
 from google.cloud import storage
 from google.cloud import vision
+from google.cloud.vision_v1.gapic.transports import image_annotator_grpc_transport
+from google.cloud.vision_v1.gapic.transports import product_search_grpc_transport
+from requests.adapters import HTTPAdapter
 
 from test_utils.retry import RetryErrors
 from test_utils.system import unique_resource_id
@@ -34,64 +44,145 @@ FACE_FILE = os.path.join(_SYS_TESTS_DIR, "data", "faces.jpg")
 LOGO_FILE = os.path.join(_SYS_TESTS_DIR, "data", "logo.png")
 PDF_FILE = os.path.join(_SYS_TESTS_DIR, "data", "pdf_test.pdf")
 PROJECT_ID = os.environ.get("PROJECT_ID")
+# Number of threads used to fan out independent uploads and deletes.
+_MAX_WORKERS = 8
+# By default gRPC channels with the same target and arguments share their
+# connections through a global subchannel pool; keep one per client instead.
+_CHANNEL_OPTIONS = [("grpc.use_local_subchannel_pool", 1)]
+# Polling schedule for async annotate operations, which take several
+# seconds: wait before the first check, then back off up to a short cap.
+_LRO_WAITING_SECONDS = 60
+_LRO_INITIAL_WAIT_SECONDS = 5
+_LRO_MAX_POLL_SECONDS = 5
+# 429 Too Many Requests in case API requests rate-limited.
+_RETRY_429 = RetryErrors(exceptions.TooManyRequests)
+# 409 Conflict if the bucket is full, or 429 as above.
+_BUCKET_RETRY = RetryErrors((exceptions.TooManyRequests, exceptions.Conflict))
+# Feature lists shared by the request dicts below; they are never mutated.
+_LOGO_FEATURES = [{"type": vision.enums.Feature.Type.LOGO_DETECTION}]
+_DOC_TEXT_FEATURES = [{"type": vision.enums.Feature.Type.DOCUMENT_TEXT_DETECTION}]
 
 
 class VisionSystemTestBase(unittest.TestCase):
     client = None
+    storage_client = None
     test_bucket = None
+    # "gs://<test bucket>/", set once the bucket name is known.
+    _gs_prefix = None
+
+    @classmethod
+    def setUpClass(cls):
+        # Read the data files once rather than in every test.
+        with io.open(FACE_FILE, "rb") as image_file:
+            cls._face_bytes = image_file.read()
+        with io.open(LOGO_FILE, "rb") as image_file:
+            cls._logo_bytes = image_file.read()
+        with io.open(PDF_FILE, "rb") as pdf_file:
+            cls._pdf_bytes = pdf_file.read()
 
     def setUp(self):
         self.to_delete_by_case = []
 
     def tearDown(self):
-        for value in self.to_delete_by_case:
-            value.delete()
+        if self.to_delete_by_case:
+            # Send all of the deletes in a single batch request.
+            with self.storage_client.batch():
+                for value in self.to_delete_by_case:
+                    value.delete()
+
+    def _upload_blob(self, blob_name, data, content_type):
+        # The test files are small and already in memory, so a single
+        # multipart upload is enough; no resumable session is needed.
+        blob = self.test_bucket.blob(blob_name)
+        self.to_delete_by_case.append(blob)
+        blob.upload_from_string(data, content_type=content_type)
+        return blob
+
+    def _wait_for_operation(self, operation, method_name):
+        # Operation.result() polls with a backoff that grows to a minute
+        # between checks, which can leave a finished operation unnoticed
+        # for a long time; poll on a shorter schedule instead.
+        deadline = time.time() + _LRO_WAITING_SECONDS
+        time.sleep(_LRO_INITIAL_WAIT_SECONDS)
+        delay = 0.5
+        while not operation.done() and time.time() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, _LRO_MAX_POLL_SECONDS)
+
+        if not operation.done():
+            self.fail(
+                "{method_name} timed out after {lro_waiting_seconds} seconds".format(
+                    method_name=method_name, lro_waiting_seconds=_LRO_WAITING_SECONDS
+                )
+            )
 
+        # Make sure getting the result is not an error.
+        return operation.result()
+
+    def _output_blob(self, output_uri_prefix):
+        # The API does not document the names of the output files, and the
+        # operation result only echoes the prefix, so list it to find them.
+        self.assertTrue(output_uri_prefix.startswith(self._gs_prefix))
+        prefix = output_uri_prefix[len(self._gs_prefix) :]
+        # There should be exactly 1 output file in gcs at the prefix.
+        blobs = list(self.test_bucket.list_blobs(prefix=prefix))
+        assert len(blobs) == 1
+        return blobs[0]
 
-def setUpModule():
-    VisionSystemTestBase.client = vision.ImageAnnotatorClient()
-    VisionSystemTestBase.ps_client = vision.ProductSearchClient()
-    storage_client = storage.Client()
-    bucket_name = "new" + unique_resource_id()
-    VisionSystemTestBase.test_bucket = storage_client.bucket(bucket_name)
+    def _download_responses(self, blob):
+        # Async annotate operations write a JSON object whose ``responses``
+        # hold one entry per annotated image or page.
+        # json.loads accepts the downloaded bytes directly on Python 2.7
+        # and 3.6+, so there is no need to decode them first.
+        return json.loads(blob.download_as_string())["responses"]
 
-    # 429 Too Many Requests in case API requests rate-limited.
-    retry_429 = RetryErrors(exceptions.TooManyRequests)
-    retry_429(VisionSystemTestBase.test_bucket.create)()
 
+def _make_storage_client():
+    credentials, _ = google.auth.default(scopes=storage.Client.SCOPE)
+    http = AuthorizedSession(credentials)
+    # Keep enough pooled connections for concurrent uploads and deletes.
+    http.mount("https://", HTTPAdapter(pool_maxsize=2 * _MAX_WORKERS))
+    return storage.Client(credentials=credentials, _http=http)
 
-def tearDownModule():
-    # 409 Conflict if the bucket is full.
-    # 429 Too Many Requests in case API requests rate-limited.
-    bucket_retry = RetryErrors((exceptions.TooManyRequests, exceptions.Conflict))
-    bucket_retry(VisionSystemTestBase.test_bucket.delete)(force=True)
 
+def _make_transport(transport_class):
+    channel = grpc_helpers.create_channel(
+        "vision.googleapis.com:443",
+        scopes=transport_class._OAUTH_SCOPES,
+        options=_CHANNEL_OPTIONS,
+    )
+    return transport_class(channel=channel)
 
-class TestVisionClientLogo(VisionSystemTestBase):
-    def test_detect_logos_content(self):
-        # Read the file.
-        with io.open(LOGO_FILE, "rb") as image_file:
-            content = image_file.read()
 
-        # Make the request.
-        response = self.client.logo_detection({"content": content})
+def setUpModule():
+    VisionSystemTestBase.client = vision.ImageAnnotatorClient(
+        transport=_make_transport(
+            image_annotator_grpc_transport.ImageAnnotatorGrpcTransport
+        )
+    )
+    VisionSystemTestBase.ps_client = vision.ProductSearchClient(
+        transport=_make_transport(
+            product_search_grpc_transport.ProductSearchGrpcTransport
+        )
+    )
+    storage_client = _make_storage_client()
+    VisionSystemTestBase.storage_client = storage_client
+    bucket_name = "new" + unique_resource_id()
+    VisionSystemTestBase.test_bucket = storage_client.bucket(bucket_name)
+    VisionSystemTestBase._gs_prefix = "gs://" + bucket_name + "/"
+    _RETRY_429(VisionSystemTestBase.test_bucket.create)()
 
-        # Check to ensure we got what we expect.
-        assert len(response.logo_annotations) == 1
-        assert response.logo_annotations[0].description == "google"
 
-    def test_detect_logos_file_handler(self):
-        # Get a file handler, and make the request using it.
-        with io.open(LOGO_FILE, "rb") as image_file:
-            response = self.client.logo_detection(image_file)
+def tearDownModule():
+    _BUCKET_RETRY(VisionSystemTestBase.test_bucket.delete)(force=True)
 
-        # Check to ensure we got what we expect.
-        assert len(response.logo_annotations) == 1
-        assert response.logo_annotations[0].description == "google"
 
-    def test_detect_logos_filename(self):
-        # Make the request with the filename directly.
-        response = self.client.logo_detection({"source": {"filename": LOGO_FILE}})
+class TestVisionClientLogo(VisionSystemTestBase):
+    def test_detect_logos_content(self):
+        # Make the request with the cached file content. Passing a file
+        # handler or a filename only changes how annotate_image reads the
+        # bytes before sending them; tests/unit/test_helpers.py covers both.
+        response = self.client.logo_detection({"content": self._logo_bytes})
 
         # Check to ensure we got what we expect.
         assert len(response.logo_annotations) == 1
@@ -100,20 +191,11 @@ class TestVisionClientLogo(VisionSystemTestBase):
     def test_detect_logos_gcs(self):
         # Upload the image to Google Cloud Storage.
         blob_name = "logo.png"
-        blob = self.test_bucket.blob(blob_name)
-        self.to_delete_by_case.append(blob)
-        with io.open(LOGO_FILE, "rb") as image_file:
-            blob.upload_from_file(image_file)
+        self._upload_blob(blob_name, self._logo_bytes, "image/png")
 
         # Make the request.
         response = self.client.logo_detection(
-            {
-                "source": {
-                    "image_uri": "gs://{bucket}/{blob}".format(
-                        bucket=self.test_bucket.name, blob=blob_name
-                    )
-                }
-            }
+            {"source": {"image_uri": self._gs_prefix + blob_name}}
         )
 
         # Check the response.
@@ -123,54 +205,26 @@ class TestVisionClientLogo(VisionSystemTestBase):
     def test_detect_logos_async(self):
         # Upload the image to Google Cloud Storage.
         blob_name = "logo_async.png"
-        blob = self.test_bucket.blob(blob_name)
-        self.to_delete_by_case.append(blob)
-        with io.open(LOGO_FILE, "rb") as image_file:
-            blob.upload_from_file(image_file)
+        self._upload_blob(blob_name, self._logo_bytes, "image/png")
 
         # Make the request.
         request = {
-            "image": {
-                "source": {
-                    "image_uri": "gs://{bucket}/{blob}".format(
-                        bucket=self.test_bucket.name, blob=blob_name
-                    )
-                }
-            },
-            "features": [{"type": vision.enums.Feature.Type.LOGO_DETECTION}],
+            "image": {"source": {"image_uri": self._gs_prefix + blob_name}},
+            "features": _LOGO_FEATURES,
         }
         method_name = "test_detect_logos_async"
-        output_gcs_uri_prefix = "gs://{bucket}/{method_name}".format(
-            bucket=self.test_bucket.name, method_name=method_name
-        )
+        output_gcs_uri_prefix = self._gs_prefix + method_name + "/"
         output_config = {"gcs_destination": {"uri": output_gcs_uri_prefix}}
         response = self.client.async_batch_annotate_images([request], output_config)
 
         # Wait for the operation to complete.
-        lro_waiting_seconds = 60
-        start_time = time.time()
-        while not response.done() and (time.time() - start_time) < lro_waiting_seconds:
-            time.sleep(1)
-
-        if not response.done():
-            self.fail(
-                "{method_name} timed out after {lro_waiting_seconds} seconds".format(
-                    method_name=method_name, lro_waiting_seconds=lro_waiting_seconds
-                )
-            )
-
-        # Make sure getting the result is not an error.
-        response.result()
+        result = self._wait_for_operation(response, method_name)
 
-        # There should be exactly 1 output file in gcs at the prefix output_gcs_uri_prefix.
-        blobs = list(self.test_bucket.list_blobs(prefix=method_name))
-        assert len(blobs) == 1
-        blob = blobs[0]
+        # Find the output file under the prefix the operation reports.
+        blob = self._output_blob(result.output_config.gcs_destination.uri)
 
         # Download the output file and verify the result
-        result_str = blob.download_as_string().decode("utf8")
-        result = json.loads(result_str)
-        responses = result["responses"]
+        responses = self._download_responses(blob)
         assert len(responses) == 1
         logo_annotations = responses[0]["logoAnnotations"]
         assert len(logo_annotations) == 1
@@ -181,55 +235,31 @@ class TestVisionClientFiles(VisionSystemTestBase):
     def test_async_batch_annotate_files(self):
         # Upload the image to Google Cloud Storage.
         blob_name = "async_batch_annotate_files.pdf"
-        blob = self.test_bucket.blob(blob_name)
-        self.to_delete_by_case.append(blob)
-        with io.open(PDF_FILE, "rb") as image_file:
-            blob.upload_from_file(image_file)
+        self._upload_blob(blob_name, self._pdf_bytes, "application/pdf")
 
         # Make the request.
         method_name = "test_async_batch_annotate_files"
-        output_gcs_uri_prefix = "gs://{bucket}/{method_name}".format(
-            bucket=self.test_bucket.name, method_name=method_name
-        )
+        output_gcs_uri_prefix = self._gs_prefix + method_name + "/"
         request = {
             "input_config": {
-                "gcs_source": {
-                    "uri": "gs://{bucket}/{blob}".format(
-                        bucket=self.test_bucket.name, blob=blob_name
-                    )
-                },
+                "gcs_source": {"uri": self._gs_prefix + blob_name},
                 "mime_type": "application/pdf",
             },
-            "features": [{"type": vision.enums.Feature.Type.DOCUMENT_TEXT_DETECTION}],
+            "features": _DOC_TEXT_FEATURES,
             "output_config": {"gcs_destination": {"uri": output_gcs_uri_prefix}},
         }
         response = self.client.async_batch_annotate_files([request])
 
         # Wait for the operation to complete.
-        lro_waiting_seconds = 60
-        start_time = time.time()
-        while not response.done() and (time.time() - start_time) < lro_waiting_seconds:
-            time.sleep(1)
+        result = self._wait_for_operation(response, method_name)
 
-        if not response.done():
-            self.fail(
-                "{method_name} timed out after {lro_waiting_seconds} seconds".format(
-                    method_name=method_name, lro_waiting_seconds=lro_waiting_seconds
-                )
-            )
-
-        # Make sure getting the result is not an error.
-        response.result()
-
-        # There should be exactly 1 output file in gcs at the prefix output_gcs_uri_prefix.
-        blobs = list(self.test_bucket.list_blobs(prefix=method_name))
-        assert len(blobs) == 1
-        blob = blobs[0]
+        # Find the output file under the prefix the operation reports.
+        assert len(result.responses) == 1
+        output_config = result.responses[0].output_config
+        blob = self._output_blob(output_config.gcs_destination.uri)
 
         # Download the output file and verify the result
-        result_str = blob.download_as_string().decode("utf8")
-        result = json.loads(result_str)
-        responses = result["responses"]
+        responses = self._download_responses(blob)
         assert len(responses) == 1
         text = responses[0]["fullTextAnnotation"]["text"]
         expected_text = "test text"
@@ -241,40 +271,67 @@ class TestVisionClientFiles(VisionSystemTestBase):
         )
 
 
+def _import_csv_row(gcs_uri_image, reference_image_id, product_set_id, product_id):
+    """Build one row of a product set import csv file."""
+    return (
+        gcs_uri_image,
+        reference_image_id,
+        product_set_id,
+        product_id,
+        "apparel",
+        "display name",
+        "color=black,style=formal",
+        "",
+    )
+
+
 @unittest.skipUnless(PROJECT_ID, "PROJECT_ID not set in environment.")
 class TestVisionClientProductSearch(VisionSystemTestBase):
+    location = "us-west1"
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestVisionClientProductSearch, cls).setUpClass()
+        cls.location_path = cls.ps_client.location_path(
+            project=PROJECT_ID, location=cls.location
+        )
+        # Generate the unique part of resource ids once for the class.
+        cls._suffix = unique_resource_id()
+
     def setUp(self):
         VisionSystemTestBase.setUp(self)
         self.reference_images_to_delete = []
         self.products_to_delete = []
         self.product_sets_to_delete = []
-        self.location = "us-west1"
-        self.location_path = self.ps_client.location_path(
-            project=PROJECT_ID, location=self.location
+
+    def _resource_id(self, prefix):
+        # The test method name keeps ids unique within the class.
+        return "{prefix}{suffix}_{test_name}".format(
+            prefix=prefix, suffix=self._suffix, test_name=self._testMethodName
         )
 
     def tearDown(self):
         VisionSystemTestBase.tearDown(self)
-        for reference_image in self.reference_images_to_delete:
-            self.ps_client.delete_reference_image(name=reference_image)
-        for product in self.products_to_delete:
-            self.ps_client.delete_product(name=product)
-        for product_set in self.product_sets_to_delete:
-            self.ps_client.delete_product_set(name=product_set)
+        deletes = (
+            (self.ps_client.delete_reference_image, self.reference_images_to_delete),
+            (self.ps_client.delete_product, self.products_to_delete),
+            (self.ps_client.delete_product_set, self.product_sets_to_delete),
+        )
+        with concurrent.futures.ThreadPoolExecutor(_MAX_WORKERS) as executor:
+            # Each kind of resource is deleted concurrently, but reference
+            # images still go before products and products before sets.
+            for delete, names in deletes:
+                list(executor.map(lambda name: delete(name=name), names))
 
     def _upload_image(self, image_name):
-        blob = self.test_bucket.blob(image_name)
-        self.to_delete_by_case.append(blob)
-        with io.open(FACE_FILE, "rb") as image_file:
-            blob.upload_from_file(image_file)
-        return "gs://{bucket}/{blob}".format(
-            bucket=self.test_bucket.name, blob=image_name
-        )
+        self._upload_blob(image_name, self._face_bytes, "image/jpeg")
+        return self._gs_prefix + image_name
 
-    def test_create_product_set(self):
-        # Create a ProductSet.
+    def test_product_search_lifecycle(self):
+        # Create a ProductSet, a Product and a ReferenceImage once and run
+        # every read and update step against them.
         product_set = vision.types.ProductSet(display_name="display name")
-        product_set_id = "set" + unique_resource_id()
+        product_set_id = self._resource_id("set")
         product_set_path = self.ps_client.product_set_path(
             project=PROJECT_ID, location=self.location, product_set=product_set_id
         )
@@ -287,62 +344,48 @@ class TestVisionClientProductSearch(VisionSystemTestBase):
         # Verify the ProductSet was successfully created.
         self.assertEqual(response.name, product_set_path)
 
-    def test_get_product_set(self):
-        # Create a ProductSet.
-        product_set = vision.types.ProductSet(display_name="display name")
-        product_set_id = "set" + unique_resource_id()
-        product_set_path = self.ps_client.product_set_path(
-            project=PROJECT_ID, location=self.location, product_set=product_set_id
+        product = vision.types.Product(
+            display_name="product display name", product_category="apparel"
         )
-        response = self.ps_client.create_product_set(
-            parent=self.location_path,
-            product_set=product_set,
-            product_set_id=product_set_id,
+        product_id = self._resource_id("product")
+        product_path = self.ps_client.product_path(
+            project=PROJECT_ID, location=self.location, product=product_id
         )
-        self.product_sets_to_delete.append(response.name)
-        self.assertEqual(response.name, product_set_path)
+        response = self.ps_client.create_product(
+            parent=self.location_path, product=product, product_id=product_id
+        )
+        self.products_to_delete.append(response.name)
+        # Verify the Product was successfully created.
+        self.assertEqual(response.name, product_path)
+
+        gcs_uri = self._upload_image("reference_image_test.jpg")
+        reference_image_id = self._resource_id("reference_image")
+        reference_image_path = self.ps_client.reference_image_path(
+            project=PROJECT_ID,
+            location=self.location,
+            product=product_id,
+            reference_image=reference_image_id,
+        )
+        reference_image = vision.types.ReferenceImage(uri=gcs_uri)
+        response = self.ps_client.create_reference_image(
+            parent=product_path,
+            reference_image=reference_image,
+            reference_image_id=reference_image_id,
+        )
+        self.reference_images_to_delete.append(response.name)
+        # Verify the ReferenceImage was successfully created.
+        self.assertEqual(response.name, reference_image_path)
+
         # Get the ProductSet.
         get_response = self.ps_client.get_product_set(name=product_set_path)
         self.assertEqual(get_response.name, product_set_path)
 
-    def test_list_product_sets(self):
-        # Create a ProductSet.
-        product_set = vision.types.ProductSet(display_name="display name")
-        product_set_id = "set" + unique_resource_id()
-        product_set_path = self.ps_client.product_set_path(
-            project=PROJECT_ID, location=self.location, product_set=product_set_id
-        )
-        response = self.ps_client.create_product_set(
-            parent=self.location_path,
-            product_set=product_set,
-            product_set_id=product_set_id,
-        )
-        self.product_sets_to_delete.append(response.name)
-        self.assertEqual(response.name, product_set_path)
-        # Verify ProductSets can be listed.
+        # Verify ProductSets can be listed; one is enough to show that.
         product_sets_iterator = self.ps_client.list_product_sets(
-            parent=self.location_path
+            parent=self.location_path, page_size=1
         )
-        product_sets_exist = False
-        for product_set in product_sets_iterator:
-            product_sets_exist = True
-            break
-        self.assertTrue(product_sets_exist)
-
-    def test_update_product_set(self):
-        # Create a ProductSet.
-        product_set = vision.types.ProductSet(display_name="display name")
-        product_set_id = "set" + unique_resource_id()
-        product_set_path = self.ps_client.product_set_path(
-            project=PROJECT_ID, location=self.location, product_set=product_set_id
-        )
-        response = self.ps_client.create_product_set(
-            parent=self.location_path,
-            product_set=product_set,
-            product_set_id=product_set_id,
-        )
-        self.product_sets_to_delete.append(response.name)
-        self.assertEqual(response.name, product_set_path)
+        self.assertIsNotNone(next(iter(product_sets_iterator), None))
+
         # Update the ProductSet.
         new_display_name = "updated name"
         updated_product_set_request = vision.types.ProductSet(
@@ -354,54 +397,10 @@ class TestVisionClientProductSearch(VisionSystemTestBase):
         )
         self.assertEqual(updated_product_set.display_name, new_display_name)
 
-    def test_create_product(self):
-        # Create a Product.
-        product = vision.types.Product(
-            display_name="product display name", product_category="apparel"
-        )
-        product_id = "product" + unique_resource_id()
-        product_path = self.ps_client.product_path(
-            project=PROJECT_ID, location=self.location, product=product_id
-        )
-        response = self.ps_client.create_product(
-            parent=self.location_path, product=product, product_id=product_id
-        )
-        self.products_to_delete.append(response.name)
-        # Verify the Product was successfully created.
-        self.assertEqual(response.name, product_path)
-
-    def test_get_product(self):
-        # Create a Product.
-        product = vision.types.Product(
-            display_name="product display name", product_category="apparel"
-        )
-        product_id = "product" + unique_resource_id()
-        product_path = self.ps_client.product_path(
-            project=PROJECT_ID, location=self.location, product=product_id
-        )
-        response = self.ps_client.create_product(
-            parent=self.location_path, product=product, product_id=product_id
-        )
-        self.products_to_delete.append(response.name)
-        self.assertEqual(response.name, product_path)
         # Get the Product.
         get_response = self.ps_client.get_product(name=product_path)
         self.assertEqual(get_response.name, product_path)
 
-    def test_update_product(self):
-        # Create a Product.
-        product = vision.types.Product(
-            display_name="product display name", product_category="apparel"
-        )
-        product_id = "product" + unique_resource_id()
-        product_path = self.ps_client.product_path(
-            project=PROJECT_ID, location=self.location, product=product_id
-        )
-        response = self.ps_client.create_product(
-            parent=self.location_path, product=product, product_id=product_id
-        )
-        self.products_to_delete.append(response.name)
-        self.assertEqual(response.name, product_path)
         # Update the Product.
         new_display_name = "updated product name"
         updated_product_request = vision.types.Product(
@@ -413,63 +412,22 @@ class TestVisionClientProductSearch(VisionSystemTestBase):
         )
         self.assertEqual(updated_product.display_name, new_display_name)
 
-    def test_list_products(self):
-        # Create a Product.
-        product = vision.types.Product(
-            display_name="product display name", product_category="apparel"
-        )
-        product_id = "product" + unique_resource_id()
-        product_path = self.ps_client.product_path(
-            project=PROJECT_ID, location=self.location, product=product_id
+        # Verify Products can be listed; one is enough to show that.
+        products_iterator = self.ps_client.list_products(
+            parent=self.location_path, page_size=1
         )
-        response = self.ps_client.create_product(
-            parent=self.location_path, product=product, product_id=product_id
-        )
-        self.products_to_delete.append(response.name)
-        self.assertEqual(response.name, product_path)
-        # Verify Products can be listed.
-        products_iterator = self.ps_client.list_products(parent=self.location_path)
-        products_exist = False
-        for product in products_iterator:
-            products_exist = True
-            break
-        self.assertTrue(products_exist)
-
-    def test_list_products_in_product_set(self):
-        # Create a ProductSet.
-        product_set = vision.types.ProductSet(display_name="display name")
-        product_set_id = "set" + unique_resource_id()
-        product_set_path = self.ps_client.product_set_path(
-            project=PROJECT_ID, location=self.location, product_set=product_set_id
-        )
-        response = self.ps_client.create_product_set(
-            parent=self.location_path,
-            product_set=product_set,
-            product_set_id=product_set_id,
-        )
-        self.product_sets_to_delete.append(response.name)
-        self.assertEqual(response.name, product_set_path)
-        # Create a Product.
-        product = vision.types.Product(
-            display_name="product display name", product_category="apparel"
-        )
-        product_id = "product" + unique_resource_id()
-        product_path = self.ps_client.product_path(
-            project=PROJECT_ID, location=self.location, product=product_id
-        )
-        response = self.ps_client.create_product(
-            parent=self.location_path, product=product, product_id=product_id
-        )
-        self.products_to_delete.append(response.name)
-        self.assertEqual(response.name, product_path)
+        self.assertIsNotNone(next(iter(products_iterator), None))
+
         # Add the Product to the ProductSet.
         self.ps_client.add_product_to_product_set(
             name=product_set_path, product=product_path
         )
-        # List the Products in the ProductSet.
-        listed_products = list(
-            self.ps_client.list_products_in_product_set(name=product_set_path)
+        # List the Products in the ProductSet. A page of two is enough to
+        # tell one Product from more than one, so only fetch the first page.
+        products_iterator = self.ps_client.list_products_in_product_set(
+            name=product_set_path, page_size=2
         )
+        listed_products = list(next(products_iterator.pages))
         self.assertEqual(len(listed_products), 1)
         self.assertEqual(listed_products[0].name, product_path)
         # Remove the Product from the ProductSet.
@@ -477,81 +435,31 @@ class TestVisionClientProductSearch(VisionSystemTestBase):
             name=product_set_path, product=product_path
         )
 
-    def test_reference_image(self):
-        # Create a Product.
-        product = vision.types.Product(
-            display_name="product display name", product_category="apparel"
-        )
-        product_id = "product" + unique_resource_id()
-        product_path = self.ps_client.product_path(
-            project=PROJECT_ID, location=self.location, product=product_id
-        )
-        response = self.ps_client.create_product(
-            parent=self.location_path, product=product, product_id=product_id
-        )
-        self.products_to_delete.append(response.name)
-        self.assertEqual(response.name, product_path)
-
-        # Upload image to gcs.
-        gcs_uri = self._upload_image("reference_image_test.jpg")
-
-        # Create a ReferenceImage.
-        reference_image_id = "reference_image" + unique_resource_id()
-        reference_image_path = self.ps_client.reference_image_path(
-            project=PROJECT_ID,
-            location=self.location,
-            product=product_id,
-            reference_image=reference_image_id,
-        )
-        reference_image = vision.types.ReferenceImage(uri=gcs_uri)
-        response = self.ps_client.create_reference_image(
-            parent=product_path,
-            reference_image=reference_image,
-            reference_image_id=reference_image_id,
-        )
-        self.reference_images_to_delete.append(response.name)
-        self.assertEqual(response.name, reference_image_path)
-
         # Get the ReferenceImage.
         get_response = self.ps_client.get_reference_image(name=reference_image_path)
         self.assertEqual(get_response.name, reference_image_path)
 
-        # List the ReferenceImages in the Product.
-        listed_reference_images = list(
-            self.ps_client.list_reference_images(parent=product_path)
+        # List the ReferenceImages in the Product, first page only.
+        reference_images_iterator = self.ps_client.list_reference_images(
+            parent=product_path, page_size=2
         )
+        listed_reference_images = list(next(reference_images_iterator.pages))
         self.assertEqual(len(listed_reference_images), 1)
         self.assertEqual(listed_reference_images[0].name, reference_image_path)
 
-    def _build_csv_line(
-        self, gcs_uri_image, reference_image_id, product_set_id, product_id
-    ):
-        return ",".join(
-            [
-                gcs_uri_image,
-                reference_image_id,
-                product_set_id,
-                product_id,
-                "apparel",
-                "display name",
-                '"color=black,style=formal"',
-                "",
-            ]
-        )
-
     def test_import_product_sets(self):
         # Generate the ids that will be used in the import.
-        product_set_id = "set" + unique_resource_id()
+        product_set_id = self._resource_id("set")
         product_set_path = self.ps_client.product_set_path(
             project=PROJECT_ID, location=self.location, product_set=product_set_id
         )
         self.product_sets_to_delete.append(product_set_path)
-        product_id = "product" + unique_resource_id()
+        product_id = self._resource_id("product")
         product_path = self.ps_client.product_path(
             project=PROJECT_ID, location=self.location, product=product_id
         )
         self.products_to_delete.append(product_path)
-        reference_image_id_1 = "reference_image_1" + unique_resource_id()
+        reference_image_id_1 = self._resource_id("reference_image_1")
         reference_image_path = self.ps_client.reference_image_path(
             project=PROJECT_ID,
             location=self.location,
@@ -559,7 +467,7 @@ class TestVisionClientProductSearch(VisionSystemTestBase):
             reference_image=reference_image_id_1,
         )
         self.reference_images_to_delete.append(reference_image_path)
-        reference_image_id_2 = "reference_image_2" + unique_resource_id()
+        reference_image_id_2 = self._resource_id("reference_image_2")
         reference_image_path = self.ps_client.reference_image_path(
             project=PROJECT_ID,
             location=self.location,
@@ -568,33 +476,40 @@ class TestVisionClientProductSearch(VisionSystemTestBase):
         )
         self.reference_images_to_delete.append(reference_image_path)
 
-        # Upload images to gcs.
-        gcs_uri_image_1 = self._upload_image("import_sets_image_1.jpg")
-        gcs_uri_image_2 = self._upload_image("import_sets_image_2.jpg")
-
-        # Build the string that will be uploaded to gcs as a csv file.
-        csv_data = "\n".join(
-            [
-                self._build_csv_line(
-                    gcs_uri_image_1, reference_image_id_1, product_set_id, product_id
-                ),
-                self._build_csv_line(
-                    gcs_uri_image_2, reference_image_id_2, product_set_id, product_id
-                ),
-            ]
-        )
+        # Generate the gcs uris the images will be uploaded to.
+        image_name_1 = "import_sets_image_1.jpg"
+        gcs_uri_image_1 = self._gs_prefix + image_name_1
+        image_name_2 = "import_sets_image_2.jpg"
+        gcs_uri_image_2 = self._gs_prefix + image_name_2
+
+        # Build the string that will be uploaded to gcs as a csv file; the
+        # csv module takes care of quoting the comma separated labels.
+        rows = [
+            _import_csv_row(
+                gcs_uri_image_1, reference_image_id_1, product_set_id, product_id
+            ),
+            _import_csv_row(
+                gcs_uri_image_2, reference_image_id_2, product_set_id, product_id
+            ),
+        ]
+        csv_buffer = six.StringIO()
+        csv.writer(csv_buffer, lineterminator="\n").writerows(rows)
+        csv_data = csv_buffer.getvalue()
 
-        # Upload a csv file to gcs.
+        # Upload the images and the csv file to gcs concurrently.
         csv_filename = "import_sets.csv"
-        blob = self.test_bucket.blob(csv_filename)
-        self.to_delete_by_case.append(blob)
-        blob.upload_from_string(csv_data)
+        with concurrent.futures.ThreadPoolExecutor(_MAX_WORKERS) as executor:
+            uploads = [
+                executor.submit(self._upload_image, image_name_1),
+                executor.submit(self._upload_image, image_name_2),
+                executor.submit(self._upload_blob, csv_filename, csv_data, "text/csv"),
+            ]
+            for upload in uploads:
+                upload.result()
 
         # Make the import_product_sets request.
         gcs_source = vision.types.ImportProductSetsGcsSource(
-            csv_file_uri="gs://{bucket}/{blob}".format(
-                bucket=self.test_bucket.name, blob=csv_filename
-            )
+            csv_file_uri=self._gs_prefix + csv_filename
         )
         input_config = vision.types.ImportProductSetsInputConfig(gcs_source=gcs_source)
         response = self.ps_client.import_product_sets(